@@ -1,5 +1,6 @@
 from shared.event_bus import EventBus
 from shared.delay_scheduler import DelayScheduler
+from shared.instrumentation import registry, instrument_executor, start_instrumentation
 import logging
 import os
 from concurrent.futures import ThreadPoolExecutor
@@ -20,6 +21,7 @@ class InventoryStore:
         }
         # Fine-grained locks per item for better concurrency
         self._locks = defaultdict(threading.RLock)
+        self._lock_wait = registry.timer('inventory.lock_wait')
     
     def check_and_reserve(self, items):
         """
@@ -31,8 +33,9 @@ class InventoryStore:
         locks = [self._locks[item_id] for item_id in item_ids]
         
         # Acquire all locks
-        for lock in locks:
-            lock.acquire()
+        with self._lock_wait.time():
+            for lock in locks:
+                lock.acquire()
         
         try:
             # Phase 2: Validate availability
@@ -71,6 +74,7 @@ scheduler = DelayScheduler()
 # Reduce workers - most work is non-blocking scheduling
 WORKERS = int(os.getenv("INVENTORY_WORKERS", "16"))  # Reduced from 64
 executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="InvWorker")
+instrument_executor(executor)
 
 INVENTORY_DELAY_SEC = float(os.getenv("INVENTORY_DELAY_SEC", "1"))
 
@@ -107,7 +111,9 @@ def check_and_reserve_inventory(order_data):
 
 def main():
     logger.info("Starting Inventory Service...")
+    start_instrumentation('inventory_service')
     event_bus.connect()
+    event_bus.warm_up()
     event_bus.subscribe(
         ['order.created'],
         handle_order_created,
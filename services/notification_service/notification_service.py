@@ -1,4 +1,5 @@
 from shared.event_bus import EventBus
+from shared.instrumentation import start_instrumentation
 import logging
 import os
 
@@ -43,7 +44,9 @@ def handle_event(event):
 
 def main():
     logger.info("Starting Notification Service...")
+    start_instrumentation('notification_service')
     event_bus.connect()
+    event_bus.warm_up()
     event_bus.subscribe(
         ['order.created', 'inventory.insufficient',
          'payment.processed', 'payment.failed'],
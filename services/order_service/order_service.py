@@ -1,5 +1,6 @@
 from flask import Flask, request, jsonify
 from shared.event_bus import EventBus
+from shared.instrumentation import start_instrumentation
 import uuid
 import logging
 import os
@@ -9,7 +10,6 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 event_bus = EventBus()
-event_bus.connect()
 
 orders = {}
 
@@ -110,5 +110,7 @@ def start_event_listeners():
 
 
 if __name__ == '__main__':
+    start_instrumentation('order_service')
+    event_bus.warm_up()
     start_event_listeners()
     app.run(host='0.0.0.0', port=8001, debug=False)
\ No newline at end of file
@@ -1,5 +1,6 @@
 from shared.event_bus import EventBus
 from shared.delay_scheduler import DelayScheduler
+from shared.instrumentation import instrument_executor, start_instrumentation
 import logging
 import time
 import uuid
@@ -15,6 +16,7 @@ scheduler = DelayScheduler()
 # Reduce workers - payment processing is lightweight
 WORKERS = int(os.getenv("PAYMENT_WORKERS", "16"))  # Reduced from 64
 executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="PayWorker")
+instrument_executor(executor)
 
 PAYMENT_DELAY_SEC = float(os.getenv("PAYMENT_DELAY_SEC", "2"))
 
@@ -64,7 +66,9 @@ def process_payment(order_data):
 
 def main():
     logger.info("Starting Payment Service...")
+    start_instrumentation('payment_service')
     event_bus.connect()
+    event_bus.warm_up()
     event_bus.subscribe(
         ['inventory.reserved'],
         handle_inventory_reserved,
@@ -0,0 +1,291 @@
+import threading
+import random
+import time
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from shared.instrumentation import registry
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the acquire timeout."""
+
+
+class ConnectionPool:
+    """
+    Bounded, health-checked connection pool.
+
+    Every connection is either idle, checked out, or being created, and the sum
+    never exceeds size. Callers only dial the broker to grow the pool into slots
+    that were never opened; slots freed by dead connections are refilled by a
+    background thread with jittered exponential backoff, so callers never dial to
+    replace a connection or while the broker is known to be down.
+
+    factory(timeout=None) must return a connection exposing is_open, close() and
+    process_data_events(time_limit); timeout bounds the dial in seconds.
+    """
+
+    def __init__(self, factory: Callable, size: int = 5, acquire_timeout: float = 5.0,
+                 health_check_interval: float = 30.0, backoff_base: float = 0.5,
+                 backoff_max: float = 30.0, min_dial_timeout: float = 0.25,
+                 name: str = 'pool'):
+        self.factory = factory
+        self.size = size
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.min_dial_timeout = min_dial_timeout
+        self.name = name
+
+        self._cv = threading.Condition()
+        self._idle = deque()
+        self._checked_out = 0
+        self._creating = 0
+        self._broker_down = False
+        self._failures = 0
+        self._next_retry = 0.0
+        self._target = 0
+        self._started = False
+        self._shutdown = False
+        self._thread = None
+
+        self._wait = registry.timer(f'{name}.wait')
+        self._exhausted = registry.counter(f'{name}.exhausted')
+        self._timeouts = registry.counter(f'{name}.timeouts')
+        self._reconnects = registry.counter(f'{name}.reconnects')
+        self._reconnect_failures = registry.counter(f'{name}.reconnect_failures')
+
+    def _total(self):
+        return len(self._idle) + self._checked_out + self._creating
+
+    def start(self, warm: int = None):
+        """
+        Start background maintenance and pre-warm connections in parallel.
+        Safe to call more than once; failures are left to the background thread.
+        """
+        with self._cv:
+            if self._started or self._shutdown:
+                return
+            self._started = True
+            if warm is None:
+                warm = self.size
+            warm = min(warm, self.size - self._total())
+            self._target = max(self._target, warm)
+            self._creating += warm
+
+        registry.gauge(f'{self.name}.idle', lambda: len(self._idle))
+        registry.gauge(f'{self.name}.checked_out', lambda: self._checked_out)
+        registry.gauge(f'{self.name}.creating', lambda: self._creating)
+        registry.gauge(f'{self.name}.broker_down', lambda: int(self._broker_down))
+
+        if warm > 0:
+            with ThreadPoolExecutor(max_workers=warm, thread_name_prefix="PoolWarmup") as warmup:
+                for _ in range(warm):
+                    warmup.submit(self._create_into_pool)
+
+        self._thread = threading.Thread(target=self._run, daemon=True, name="ConnectionPool")
+        self._thread.start()
+        logger.info(f"ConnectionPool '{self.name}' started ({len(self._idle)}/{self.size} warm)")
+
+    def _create_into_pool(self):
+        """Create one connection for a slot already reserved in _creating."""
+        try:
+            connection = self.factory()
+        except Exception as e:
+            self._on_connect_failure(e)
+            return False
+
+        with self._cv:
+            self._creating -= 1
+            if self._shutdown:
+                self._close_quietly(connection)
+                return False
+            self._idle.append(connection)
+            self._broker_down = False
+            self._failures = 0
+            self._cv.notify_all()
+        return True
+
+    def _on_connect_failure(self, error):
+        """Release the reserved slot and mark the broker down until the next retry."""
+        with self._cv:
+            self._creating -= 1
+            self._broker_down = True
+            self._failures += 1
+            self._next_retry = time.monotonic() + self._backoff()
+            self._cv.notify_all()
+        self._reconnect_failures.inc()
+        logger.warning(f"ConnectionPool '{self.name}' failed to connect: {error}")
+
+    def _on_dial_deadline(self, error):
+        """A caller's dial ran out of its own deadline: free the slot, broker state unknown."""
+        with self._cv:
+            self._creating -= 1
+            self._cv.notify_all()
+        logger.warning(f"ConnectionPool '{self.name}' dial exceeded caller deadline: {error}")
+
+    def acquire(self, timeout: float = None):
+        """
+        Check out a connection, opening a new one only if the pool has never
+        grown this far and at least min_dial_timeout of the deadline is left.
+        Raises PoolTimeout if none is available within timeout seconds,
+        including while the broker is down or a slot is being refilled.
+        """
+        if not self._started:
+            self.start(warm=0)
+        if timeout is None:
+            timeout = self.acquire_timeout
+
+        deadline = time.monotonic() + timeout
+        waited = False
+        start = time.perf_counter()
+        try:
+            with self._cv:
+                while True:
+                    if self._shutdown:
+                        raise PoolTimeout(f"ConnectionPool '{self.name}' is closed")
+
+                    while self._idle:
+                        connection = self._idle.pop()
+                        if connection.is_open:
+                            self._checked_out += 1
+                            return connection
+                        self._close_quietly(connection)
+                        # Freed slot belongs to the background thread
+                        self._cv.notify_all()
+
+                    remaining = deadline - time.monotonic()
+                    total = self._total()
+                    if (not self._broker_down and self._target <= total < self.size
+                            and remaining >= self.min_dial_timeout):
+                        self._creating += 1
+                        self._target = total + 1
+                        break
+
+                    if not waited:
+                        waited = True
+                        self._exhausted.inc()
+                    if remaining <= 0:
+                        self._timeouts.inc()
+                        raise PoolTimeout(
+                            f"No connection available from '{self.name}' within {timeout}s"
+                        )
+                    self._cv.wait(timeout=remaining)
+
+            # Never-opened slot: connect outside the lock, bounded by the deadline
+            try:
+                connection = self.factory(timeout=max(deadline - time.monotonic(), 0.001))
+            except Exception as e:
+                if time.monotonic() >= deadline:
+                    # The dial was cut short by this caller's deadline, not refused
+                    self._on_dial_deadline(e)
+                    self._timeouts.inc()
+                    raise PoolTimeout(
+                        f"No connection available from '{self.name}' within {timeout}s"
+                    ) from e
+                self._on_connect_failure(e)
+                raise
+            with self._cv:
+                self._creating -= 1
+                self._checked_out += 1
+            return connection
+        finally:
+            # Every acquire is timed, so {name}.wait covers fast and slow paths alike
+            self._wait.observe(time.perf_counter() - start)
+
+    def release(self, connection):
+        """Return a connection. Dead connections free their slot for background refill."""
+        with self._cv:
+            self._checked_out -= 1
+            if connection.is_open and not self._shutdown:
+                self._idle.append(connection)
+            else:
+                self._close_quietly(connection)
+            self._cv.notify_all()
+
+    def _backoff(self):
+        """Full-jitter exponential backoff for the current failure streak."""
+        cap = min(self.backoff_max, self.backoff_base * (2 ** min(self._failures, 16)))
+        return random.uniform(0, cap)
+
+    def _health_check(self):
+        """Ping idle connections one at a time; those that fail are dropped."""
+        with self._cv:
+            pending = len(self._idle)
+
+        for _ in range(pending):
+            with self._cv:
+                if self._shutdown or not self._idle:
+                    return
+                # Oldest first: acquire() takes from the other end
+                connection = self._idle.popleft()
+                self._checked_out += 1
+            try:
+                # Services heartbeats and detects sockets closed by the broker
+                connection.process_data_events(time_limit=0)
+            except Exception as e:
+                logger.warning(f"ConnectionPool '{self.name}' dropping unhealthy connection: {e}")
+                self._close_quietly(connection)
+            self.release(connection)
+
+    def _run(self):
+        """Background loop: health checks and reconnects, off the publishing path."""
+        next_check = time.monotonic() + self.health_check_interval
+        while True:
+            with self._cv:
+                if self._shutdown:
+                    break
+                now = time.monotonic()
+                if self._broker_down:
+                    wait = self._next_retry - now
+                elif self._total() < self._target:
+                    wait = 0
+                else:
+                    wait = next_check - now
+                if wait > 0:
+                    self._cv.wait(timeout=wait)
+                    continue
+
+                reconnect = (
+                    (self._broker_down or self._total() < self._target)
+                    and self._total() < self.size
+                )
+                if reconnect:
+                    self._creating += 1
+                elif self._broker_down:
+                    # Pool is full of checked-out connections; retry later
+                    self._next_retry = now + self._backoff()
+                    continue
+
+            if reconnect:
+                if self._create_into_pool():
+                    self._reconnects.inc()
+                    logger.info(f"ConnectionPool '{self.name}' reconnected")
+            else:
+                self._health_check()
+                next_check = time.monotonic() + self.health_check_interval
+
+    @staticmethod
+    def _close_quietly(connection):
+        try:
+            if connection.is_open:
+                connection.close()
+        except Exception:
+            pass
+
+    def close(self):
+        """Stop background maintenance and close idle connections."""
+        with self._cv:
+            self._shutdown = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cv.notify_all()
+        for connection in idle:
+            self._close_quietly(connection)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
@@ -4,6 +4,8 @@ import time
 import logging
 import traceback
 
+from shared.instrumentation import registry
+
 logger = logging.getLogger(__name__)
 
 class DelayScheduler:
@@ -30,6 +32,8 @@ class DelayScheduler:
         self._heap = []
         self._shutdown = False
         self._thread = threading.Thread(target=self._run, daemon=True, name="DelayScheduler")
+        self._lateness = registry.timer('delay_scheduler.lateness')
+        registry.gauge('delay_scheduler.heap_size', lambda: len(self._heap))
         self._thread.start()
         logger.info("DelayScheduler initialized")
 
@@ -64,6 +68,7 @@ class DelayScheduler:
                 
                 heapq.heappop(self._heap)
             
+            self._lateness.observe(now - run_at)
             # Execute outside the lock
             try:
                 fn(*args, **kwargs)
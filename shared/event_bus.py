@@ -4,8 +4,8 @@ from typing import Callable, Dict, Any
 from datetime import datetime
 import logging
 import os
-import threading
-from queue import Queue, Empty
+
+from shared.connection_pool import ConnectionPool
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -14,55 +14,63 @@ logger = logging.getLogger(__name__)
 class EventBus:
     """Central event bus for publishing and consuming events (with connection pooling)."""
 
-    def __init__(self, host: str = None, pool_size: int = 5):
+    def __init__(self, host: str = None, pool_size: int = 5, acquire_timeout: float = None,
+                 port: int = None):
         if host is None:
             host = os.getenv('RABBITMQ_HOST', 'localhost')
+        if port is None:
+            port = int(os.getenv('RABBITMQ_PORT', '5672'))
         self.host = host
+        self.port = port
         self.username = os.getenv('RABBITMQ_USER', 'admin')
         self.password = os.getenv('RABBITMQ_PASS', 'admin')
         self.exchange_name = 'order_events'
 
+        if acquire_timeout is None:
+            acquire_timeout = float(os.getenv('EVENT_BUS_ACQUIRE_TIMEOUT', '5'))
         self.pool_size = pool_size
-        self.pool = Queue(maxsize=pool_size)
-        self.pool_lock = threading.Lock()
+        self.pool = ConnectionPool(
+            self._create_connection,
+            size=pool_size,
+            acquire_timeout=acquire_timeout,
+            health_check_interval=float(os.getenv('EVENT_BUS_HEALTH_CHECK_SEC', '30')),
+            name='event_bus.pool'
+        )
 
         self.consumer_connection = None
         self.consumer_channel = None
 
-    def _create_connection(self):
+    def _create_connection(self, timeout: float = None):
         credentials = pika.PlainCredentials(self.username, self.password)
+        limits = {}
+        if timeout is not None:
+            # Bound the whole dial (TCP + AMQP handshake) for callers with a deadline
+            limits = {'socket_timeout': timeout, 'stack_timeout': timeout}
         parameters = pika.ConnectionParameters(
             host=self.host,
+            port=self.port,
             credentials=credentials,
             heartbeat=600,
-            blocked_connection_timeout=300
+            blocked_connection_timeout=300,
+            **limits
         )
         return pika.BlockingConnection(parameters)
 
     def _get_connection(self):
-        """Get a connection from pool or create a new one if pool isn't full."""
-        try:
-            return self.pool.get_nowait()
-        except Empty:
-            with self.pool_lock:
-                if self.pool.qsize() + 1 <= self.pool_size:
-                    return self._create_connection()
-                else:
-                    # Wait until a connection is returned
-                    return self.pool.get()
+        """Check out a pooled connection (raises PoolTimeout if none is available in time)."""
+        return self.pool.acquire()
 
     def _return_connection(self, connection):
-        """Return a connection to the pool."""
+        """Return a connection to the pool; dead ones are replaced in the background."""
         try:
-            if connection.is_open:
-                self.pool.put_nowait(connection)
-            else:
-                # Replace closed connection
-                new_conn = self._create_connection()
-                self.pool.put_nowait(new_conn)
+            self.pool.release(connection)
         except Exception as e:
             logger.warning(f"Failed returning connection to pool: {e}")
 
+    def warm_up(self):
+        """Pre-open publisher connections in parallel and start pool health checks."""
+        self.pool.start()
+
     def connect(self):
         """Establish persistent connection for consumers only."""
         self.consumer_connection = self._create_connection()
@@ -152,12 +160,7 @@ class EventBus:
 
     def close(self):
         """Close all pooled and consumer connections."""
-        while not self.pool.empty():
-            conn = self.pool.get_nowait()
-            try:
-                conn.close()
-            except:
-                pass
+        self.pool.close()
         if self.consumer_connection:
             self.consumer_connection.close()
         logger.info("EventBus connections closed")
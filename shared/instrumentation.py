@@ -0,0 +1,288 @@
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter as _FrameCounter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict
+from urllib.parse import urlparse, parse_qs
+
+logger = logging.getLogger(__name__)
+
+
+class Counter:
+    """Monotonic counter. Increment is a single locked add."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = 0
+
+    def inc(self, amount: int = 1):
+        with self._lock:
+            self._value += amount
+
+    def snapshot(self):
+        return self._value
+
+
+class Timer:
+    """Accumulates count / total / max of observed durations (seconds)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._count = 0
+        self._total = 0.0
+        self._max = 0.0
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._count += 1
+            self._total += seconds
+            if seconds > self._max:
+                self._max = seconds
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def snapshot(self):
+        with self._lock:
+            count, total, max_ = self._count, self._total, self._max
+        return {
+            'count': count,
+            'total_sec': total,
+            'avg_sec': total / count if count else 0.0,
+            'max_sec': max_,
+        }
+
+
+class Registry:
+    """
+    Process-wide registry of counters, timers and gauges.
+    Singleton pattern to share across modules.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+                    cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+        self._initialized = True
+        self._metrics_lock = threading.Lock()
+        self._counters: Dict[str, Counter] = {}
+        self._timers: Dict[str, Timer] = {}
+        self._gauges: Dict[str, Callable[[], float]] = {}
+
+    def counter(self, name: str) -> Counter:
+        """Get or create the counter registered under name."""
+        with self._metrics_lock:
+            if name not in self._counters:
+                self._counters[name] = Counter()
+            return self._counters[name]
+
+    def timer(self, name: str) -> Timer:
+        """Get or create the timer registered under name."""
+        with self._metrics_lock:
+            if name not in self._timers:
+                self._timers[name] = Timer()
+            return self._timers[name]
+
+    def gauge(self, name: str, fn: Callable[[], float]):
+        """Register a gauge. fn is only called when a snapshot is taken."""
+        with self._metrics_lock:
+            self._gauges[name] = fn
+
+    def snapshot(self):
+        """Return all metrics as a JSON-serialisable dict."""
+        with self._metrics_lock:
+            counters = dict(self._counters)
+            timers = dict(self._timers)
+            gauges = dict(self._gauges)
+
+        gauge_values = {}
+        for name, fn in gauges.items():
+            try:
+                gauge_values[name] = fn()
+            except Exception as e:
+                logger.warning(f"Gauge '{name}' failed: {e}")
+                gauge_values[name] = None
+
+        return {
+            'counters': {name: c.snapshot() for name, c in counters.items()},
+            'timers': {name: t.snapshot() for name, t in timers.items()},
+            'gauges': gauge_values,
+        }
+
+
+registry = Registry()
+
+
+def instrument_executor(executor, name: str = 'executor'):
+    """
+    Count tasks submitted to and started by executor, and register
+    {name}.queue_length as the number submitted but not yet started.
+    """
+    submitted = registry.counter(f'{name}.submitted')
+    started = registry.counter(f'{name}.started')
+    submit = executor.submit
+
+    def run(fn, args, kwargs):
+        started.inc()
+        return fn(*args, **kwargs)
+
+    def instrumented_submit(fn, *args, **kwargs):
+        future = submit(run, fn, args, kwargs)
+        submitted.inc()
+        return future
+
+    executor.submit = instrumented_submit
+    registry.gauge(f'{name}.queue_length', lambda: max(submitted.snapshot() - started.snapshot(), 0))
+    return executor
+
+
+class SamplingProfiler:
+    """
+    On-demand wall-clock sampling profiler.
+
+    Nothing runs while idle; a sampling thread exists only for the duration
+    of a profile. Output is in collapsed-stack format ("a;b;c <count>"),
+    which flamegraph.pl and speedscope accept directly.
+    """
+
+    MAX_DURATION_SEC = 60.0
+
+    def __init__(self, interval_sec: float = 0.005):
+        self.interval_sec = interval_sec
+        self._running = threading.Lock()
+
+    @staticmethod
+    def _fold(frame, thread_name):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+            frame = frame.f_back
+        stack.append(thread_name)
+        return ';'.join(reversed(stack))
+
+    def profile(self, duration_sec: float) -> str:
+        """
+        Sample all threads for duration_sec seconds and return folded stacks.
+        Raises RuntimeError if another profile is already in progress.
+        """
+        if not self._running.acquire(blocking=False):
+            raise RuntimeError("Profile already in progress")
+        try:
+            duration_sec = min(max(float(duration_sec), 0.0), self.MAX_DURATION_SEC)
+            own_id = threading.get_ident()
+            samples = _FrameCounter()
+            deadline = time.monotonic() + duration_sec
+
+            while time.monotonic() < deadline:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_id:
+                        continue
+                    samples[self._fold(frame, names.get(thread_id, str(thread_id)))] += 1
+                time.sleep(self.interval_sec)
+
+            return ''.join(f"{stack} {count}\n" for stack, count in samples.items())
+        finally:
+            self._running.release()
+
+    def profile_to_file(self, duration_sec: float, path: str):
+        """Run a profile and write the folded stacks to path."""
+        try:
+            output = self.profile(duration_sec)
+        except RuntimeError as e:
+            logger.warning(f"Profile to {path} skipped: {e}")
+            return
+        with open(path, 'w') as f:
+            f.write(output)
+        logger.info(f"Profile written to {path}")
+
+
+profiler = SamplingProfiler()
+
+
+class _InstrumentationHandler(BaseHTTPRequestHandler):
+    """GET /metrics -> JSON snapshot, GET /profile?seconds=N -> folded stacks."""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/metrics':
+            self._send(200, 'application/json', json.dumps(registry.snapshot()))
+        elif url.path == '/profile':
+            try:
+                seconds = float(parse_qs(url.query).get('seconds', ['10'])[0])
+            except ValueError:
+                self._send(400, 'text/plain', 'Invalid seconds\n')
+                return
+            try:
+                self._send(200, 'text/plain', profiler.profile(seconds))
+            except RuntimeError as e:
+                self._send(409, 'text/plain', f"{e}\n")
+        else:
+            self._send(404, 'text/plain', 'Not found\n')
+
+    def _send(self, status, content_type, body):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def start_instrumentation(service_name: str, port: int = None):
+    """
+    Expose metrics and profiling for a service.
+
+    Starts the instrumentation HTTP server on METRICS_PORT (default 9100) and,
+    when called from the main thread, installs a SIGUSR1 handler that writes a
+    PROFILE_SECONDS-long profile to PROFILE_DIR.
+    """
+    if port is None:
+        port = int(os.getenv('METRICS_PORT', '9100'))
+
+    server = ThreadingHTTPServer(('0.0.0.0', port), _InstrumentationHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="Instrumentation").start()
+    logger.info(f"Instrumentation for {service_name} listening on port {port}")
+
+    profile_dir = os.getenv('PROFILE_DIR', '/tmp')
+    profile_seconds = float(os.getenv('PROFILE_SECONDS', '10'))
+
+    def on_signal(signum, frame):
+        path = os.path.join(profile_dir, f"{service_name}-{int(time.time())}.folded")
+        # Never sample from inside the signal handler itself
+        threading.Thread(
+            target=profiler.profile_to_file,
+            args=(profile_seconds, path),
+            daemon=True,
+            name="Profiler"
+        ).start()
+
+    if hasattr(signal, 'SIGUSR1') and threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGUSR1, on_signal)
+
+    return server
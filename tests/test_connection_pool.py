@@ -0,0 +1,250 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+from shared.connection_pool import ConnectionPool, PoolTimeout
+from shared.instrumentation import registry
+
+
+class FakeConnection:
+    def __init__(self, broker):
+        self.broker = broker
+        self.is_open = True
+
+    def process_data_events(self, time_limit=0):
+        self.broker.pings += 1
+        if not self.is_open:
+            raise ConnectionError("Connection closed by broker")
+
+    def close(self):
+        self.is_open = False
+
+
+class FakeBroker:
+    """Local stand-in broker: hands out fake connections and can crash on demand."""
+
+    def __init__(self, connect_delay=0.05):
+        self.connect_delay = connect_delay
+        self.up = True
+        self.connections = []
+        self.dials = []
+        self.spans = []
+        self.pings = 0
+        self._lock = threading.Lock()
+
+    def connect(self, timeout=None):
+        start = time.monotonic()
+        with self._lock:
+            self.dials.append((threading.current_thread().name, start))
+        if timeout is not None and timeout < self.connect_delay:
+            time.sleep(timeout)
+            raise TimeoutError("Dial timed out")
+        time.sleep(self.connect_delay)
+        with self._lock:
+            self.spans.append((start, time.monotonic()))
+        if not self.up:
+            raise ConnectionError("Broker unavailable")
+        connection = FakeConnection(self)
+        with self._lock:
+            self.connections.append(connection)
+        return connection
+
+    def crash(self):
+        self.up = False
+        for connection in self.connections:
+            connection.is_open = False
+
+    def dials_from(self, thread_name):
+        return [d for d in self.dials if d[0] == thread_name]
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class ConnectionPoolTest(unittest.TestCase):
+
+    def make_pool(self, **kwargs):
+        self.broker = FakeBroker()
+        options = dict(size=3, acquire_timeout=0.3, health_check_interval=60,
+                       backoff_base=0.05, backoff_max=0.2, name='test.pool')
+        options.update(kwargs)
+        pool = ConnectionPool(self.broker.connect, **options)
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_warm_up_opens_connections_in_parallel(self):
+        pool = self.make_pool()
+        self.broker.connect_delay = 0.2
+        pool.start()
+
+        self.assertEqual(len(pool._idle), 3)
+        self.assertEqual(len(self.broker.spans), 3)
+        # Serial dials would not overlap: each would start after the previous ended
+        latest_start = max(start for start, _ in self.broker.spans)
+        earliest_end = min(end for _, end in self.broker.spans)
+        self.assertLess(latest_start, earliest_end)
+
+    def test_acquire_times_out_when_exhausted(self):
+        pool = self.make_pool()
+        pool.start()
+        connections = [pool.acquire() for _ in range(3)]
+        self.assertEqual(pool._checked_out, 3)
+
+        start = time.monotonic()
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(timeout=0.2)
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+
+        pool.release(connections[0])
+        self.assertIs(pool.acquire(timeout=0.2), connections[0])
+
+    def test_crash_with_checked_out_connections(self):
+        pool = self.make_pool()
+        pool.start()
+        connections = [pool.acquire() for _ in range(2)]
+        self.broker.crash()
+
+        caller = threading.current_thread().name
+        for connection in connections:
+            pool.release(connection)
+        # Releasing dead connections never dials on the caller's thread
+        self.assertEqual(self.broker.dials_from(caller), [])
+
+        self.assertTrue(wait_for(lambda: pool._broker_down))
+        self.assertEqual(pool._checked_out, 0)
+        self.assertLessEqual(pool._total(), pool.size)
+
+    def test_callers_never_dial_while_broker_down(self):
+        pool = self.make_pool()
+        pool.start()
+        self.broker.crash()
+        # Dead idle connections are dropped; their slots belong to the background thread
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(timeout=0.1)
+        self.assertTrue(wait_for(lambda: pool._broker_down))
+
+        caller = threading.current_thread().name
+        dials_before = len(self.broker.dials_from(caller))
+        for _ in range(3):
+            with self.assertRaises(PoolTimeout):
+                pool.acquire(timeout=0.1)
+        self.assertEqual(len(self.broker.dials_from(caller)), dials_before)
+
+    def test_dead_slot_is_refilled_by_background_thread(self):
+        pool = self.make_pool(size=1, acquire_timeout=0.2)
+        pool.start()
+        connection = pool.acquire()
+        connection.close()
+        self.broker.connect_delay = 0.4
+        pool.release(connection)
+
+        # The caller waits rather than dialing, and times out before the refill lands
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+        self.assertTrue(wait_for(lambda: len(pool._idle) == 1))
+        self.assertTrue(pool._idle[0].is_open)
+        self.assertIsNot(pool._idle[0], connection)
+
+        self.assertEqual(self.broker.dials_from(threading.current_thread().name), [])
+        self.assertEqual(len(self.broker.dials_from('ConnectionPool')), 1)
+
+    def test_caller_deadline_does_not_mark_broker_down(self):
+        pool = self.make_pool(size=1)
+        self.broker.connect_delay = 0.5
+
+        # Lazy, never-opened slot: the caller dials, bounded by its own deadline
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(timeout=0.3)
+        self.assertEqual(len(self.broker.dials_from(threading.current_thread().name)), 1)
+        self.assertFalse(pool._broker_down)
+
+        # The freed slot is refilled in the background without a backoff
+        self.assertTrue(wait_for(lambda: len(pool._idle) == 1))
+        self.assertEqual(pool._failures, 0)
+
+    def test_no_dial_with_too_little_deadline_left(self):
+        pool = self.make_pool(size=1, min_dial_timeout=0.25)
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(timeout=0.1)
+        self.assertEqual(self.broker.dials, [])
+        self.assertFalse(pool._broker_down)
+
+    @mock.patch('shared.connection_pool.random.uniform', side_effect=lambda low, high: high)
+    def test_background_refill_backs_off_then_recovers(self, _uniform):
+        pool = self.make_pool()
+        pool.start()
+        self.broker.crash()
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(timeout=0.1)
+
+        self.assertTrue(wait_for(lambda: len(self.broker.dials_from('ConnectionPool')) >= 4))
+        retries = [t for _, t in self.broker.dials_from('ConnectionPool')]
+        gaps = [b - a for a, b in zip(retries, retries[1:])]
+        # With jitter pinned to its cap, each retry waits dial + min(base * 2^n, max)
+        expected = [min(pool.backoff_base * 2 ** n, pool.backoff_max) for n in range(1, len(gaps) + 1)]
+        for gap, backoff in zip(gaps, expected):
+            self.assertGreaterEqual(gap, backoff + self.broker.connect_delay - 0.01)
+
+        self.broker.up = True
+        self.assertTrue(wait_for(lambda: len(pool._idle) == 3 and not pool._broker_down))
+        self.assertTrue(all(c.is_open for c in pool._idle))
+
+    def test_pool_metrics(self):
+        pool = self.make_pool(size=1, name='test.metrics.pool')
+        pool.start()
+        connection = pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(timeout=0.1)
+
+        metrics = registry.snapshot()
+        self.assertEqual(metrics['timers']['test.metrics.pool.wait']['count'], 2)
+        self.assertGreaterEqual(metrics['timers']['test.metrics.pool.wait']['max_sec'], 0.1)
+        self.assertEqual(metrics['counters']['test.metrics.pool.exhausted'], 1)
+        self.assertEqual(metrics['counters']['test.metrics.pool.timeouts'], 1)
+        self.assertEqual(metrics['gauges']['test.metrics.pool.checked_out'], 1)
+        self.assertEqual(metrics['gauges']['test.metrics.pool.idle'], 0)
+
+        self.broker.crash()
+        pool.release(connection)
+        self.assertTrue(wait_for(
+            lambda: registry.snapshot()['counters']['test.metrics.pool.reconnect_failures'] >= 1
+        ))
+        self.assertEqual(registry.snapshot()['gauges']['test.metrics.pool.broker_down'], 1)
+
+        self.broker.up = True
+        self.assertTrue(wait_for(
+            lambda: registry.snapshot()['counters']['test.metrics.pool.reconnects'] >= 1
+        ))
+        metrics = registry.snapshot()
+        self.assertEqual(metrics['gauges']['test.metrics.pool.broker_down'], 0)
+        self.assertEqual(metrics['gauges']['test.metrics.pool.idle'], 1)
+        self.assertEqual(metrics['gauges']['test.metrics.pool.creating'], 0)
+
+    def test_health_check_pings_one_connection_at_a_time(self):
+        pool = self.make_pool(health_check_interval=0.05)
+        pool.start()
+        self.assertTrue(wait_for(lambda: self.broker.pings >= 6))
+        # The pool never looks fully checked out because of health checks
+        for _ in range(20):
+            self.assertLessEqual(pool._checked_out, 1)
+            time.sleep(0.005)
+
+    def test_health_check_drops_dead_idle_connections(self):
+        pool = self.make_pool(health_check_interval=0.05)
+        pool.start()
+        self.broker.crash()
+        self.broker.up = True
+        self.assertTrue(wait_for(
+            lambda: len(pool._idle) == 3 and all(c.is_open for c in pool._idle)
+        ))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import socket
+import struct
+import threading
+import time
+import unittest
+
+try:
+    import pika
+    from pika.adapters.utils.connection_workflow import AMQPConnectorStackTimeout
+    from shared.event_bus import EventBus
+    from shared.connection_pool import PoolTimeout
+except ImportError:
+    pika = None
+
+
+class StandInBroker:
+    """
+    Local TCP listener posing as RabbitMQ. In 'stall' mode it accepts and never
+    speaks AMQP; in 'reset' mode it accepts and immediately drops the socket.
+    """
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.accepted = 0
+        self._sockets = []
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.bind(('127.0.0.1', 0))
+        self._server.listen(16)
+        # Poll so close() can stop the accept loop
+        self._server.settimeout(0.05)
+        self.port = self._server.getsockname()[1]
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._serve, daemon=True, name="StandInBroker")
+        self._thread.start()
+
+    def _serve(self):
+        while not self._closed:
+            try:
+                client, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            client.settimeout(None)
+            with self._lock:
+                self.accepted += 1
+                if self.mode == 'reset' or self._closed:
+                    # Zero linger turns close() into a TCP reset
+                    client.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+                    client.close()
+                else:
+                    self._sockets.append(client)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            sockets, self._sockets = self._sockets, []
+        self._thread.join(timeout=5)
+        self._server.close()
+        for client in sockets:
+            client.close()
+
+
+@unittest.skipUnless(pika, "pika is not installed")
+class EventBusFaultInjectionTest(unittest.TestCase):
+
+    def make_bus(self, mode, acquire_timeout):
+        broker = StandInBroker(mode)
+        bus = EventBus(host='127.0.0.1', port=broker.port, pool_size=1,
+                       acquire_timeout=acquire_timeout)
+        self.addCleanup(bus.pool.close)
+        # Runs first: dropping the sockets unblocks any background dial still in flight
+        self.addCleanup(broker.close)
+        return broker, bus
+
+    def test_dial_timeout_is_honoured(self):
+        broker, bus = self.make_bus('stall', acquire_timeout=5)
+        start = time.monotonic()
+        with self.assertRaises(AMQPConnectorStackTimeout):
+            bus._create_connection(timeout=0.5)
+        elapsed = time.monotonic() - start
+        self.assertGreaterEqual(elapsed, 0.5)
+        # pika's defaults would wait 10-15 s for a stalled handshake
+        self.assertLess(elapsed, 5.0)
+        self.assertEqual(broker.accepted, 1)
+
+    def test_publish_returns_within_acquire_timeout_when_broker_stalls(self):
+        broker, bus = self.make_bus('stall', acquire_timeout=0.5)
+        start = time.monotonic()
+        with self.assertLogs('shared.event_bus', level='ERROR') as logs:
+            bus.publish_event('order.created', {'order_id': 'o1'})
+        self.assertLess(time.monotonic() - start, 0.5 + 2.0)
+        self.assertIn('No connection available', logs.output[0])
+        self.assertGreaterEqual(broker.accepted, 1)
+        # Hitting the caller's own deadline says nothing about broker health
+        self.assertFalse(bus.pool._broker_down)
+
+    def test_publish_after_reset_does_not_redial_from_caller(self):
+        broker, bus = self.make_bus('reset', acquire_timeout=0.5)
+        with self.assertLogs('shared.event_bus', level='ERROR'):
+            bus.publish_event('order.created', {'order_id': 'o1'})
+        self.assertTrue(bus.pool._broker_down)
+
+        # While the broker is down the caller waits out its timeout instead of dialing
+        bus.pool.backoff_base = bus.pool.backoff_max = 60
+        bus.pool._next_retry = time.monotonic() + 60
+        accepted = broker.accepted
+        start = time.monotonic()
+        with self.assertRaises(PoolTimeout):
+            bus.pool.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.5)
+        bus.publish_event('order.created', {'order_id': 'o2'})
+        self.assertEqual(broker.accepted, accepted)
+
+
+if __name__ == '__main__':
+    unittest.main()
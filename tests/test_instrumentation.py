@@ -0,0 +1,165 @@
+import json
+import re
+import signal
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from shared import instrumentation
+from shared.instrumentation import (
+    Registry, SamplingProfiler, Timer, instrument_executor, registry, start_instrumentation
+)
+
+# "frame;frame;... <count>" as read by flamegraph.pl
+FOLDED_LINE = re.compile(r'^[^;\s][^\n]*(;[^\n]+)* \d+$')
+
+
+class TimerTest(unittest.TestCase):
+
+    def test_empty_snapshot_has_zero_average(self):
+        self.assertEqual(Timer().snapshot(), {
+            'count': 0, 'total_sec': 0.0, 'avg_sec': 0.0, 'max_sec': 0.0
+        })
+
+    def test_snapshot_math(self):
+        timer = Timer()
+        for seconds in (0.1, 0.3, 0.2):
+            timer.observe(seconds)
+        snapshot = timer.snapshot()
+        self.assertEqual(snapshot['count'], 3)
+        self.assertAlmostEqual(snapshot['total_sec'], 0.6)
+        self.assertAlmostEqual(snapshot['avg_sec'], 0.2)
+        self.assertAlmostEqual(snapshot['max_sec'], 0.3)
+
+
+class RegistryTest(unittest.TestCase):
+
+    def test_singleton(self):
+        self.assertIs(Registry(), registry)
+
+    def test_get_or_create_returns_same_object(self):
+        self.assertIs(registry.counter('test.registry.counter'),
+                      registry.counter('test.registry.counter'))
+        self.assertIs(registry.timer('test.registry.timer'),
+                      registry.timer('test.registry.timer'))
+
+    def test_failing_gauge_reports_none(self):
+        registry.gauge('test.registry.ok', lambda: 7)
+        registry.gauge('test.registry.broken', lambda: 1 / 0)
+        gauges = registry.snapshot()['gauges']
+        self.assertEqual(gauges['test.registry.ok'], 7)
+        self.assertIsNone(gauges['test.registry.broken'])
+
+
+class InstrumentExecutorTest(unittest.TestCase):
+
+    def test_queue_length_counts_submitted_but_not_started(self):
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+        instrument_executor(executor, name='test.executor')
+        gate = threading.Event()
+
+        futures = [executor.submit(gate.wait) for _ in range(3)]
+        queue_length = lambda: registry.snapshot()['gauges']['test.executor.queue_length']
+        deadline = time.monotonic() + 2
+        while queue_length() != 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(queue_length(), 2)
+
+        gate.set()
+        for future in futures:
+            self.assertTrue(future.result(timeout=2))
+        self.assertEqual(queue_length(), 0)
+        self.assertEqual(registry.counter('test.executor.submitted').snapshot(), 3)
+
+
+class SamplingProfilerTest(unittest.TestCase):
+
+    def test_output_is_collapsed_stacks(self):
+        stop = threading.Event()
+        worker = threading.Thread(target=stop.wait, name="ProfiledWorker")
+        worker.start()
+        self.addCleanup(worker.join)
+        self.addCleanup(stop.set)
+
+        output = SamplingProfiler(interval_sec=0.001).profile(0.05)
+        lines = output.splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            self.assertRegex(line, FOLDED_LINE)
+        self.assertTrue(any(line.startswith('ProfiledWorker;') for line in lines))
+
+    def test_duration_is_capped(self):
+        profiler = SamplingProfiler()
+        profiler.MAX_DURATION_SEC = 0.05
+        start = time.monotonic()
+        profiler.profile(3600)
+        self.assertLess(time.monotonic() - start, 1.0)
+
+    def test_concurrent_profile_is_rejected(self):
+        profiler = SamplingProfiler()
+        thread = threading.Thread(target=profiler.profile, args=(0.5,))
+        thread.start()
+        self.addCleanup(thread.join)
+        time.sleep(0.05)
+        with self.assertRaises(RuntimeError):
+            profiler.profile(0.01)
+
+
+class InstrumentationServerTest(unittest.TestCase):
+
+    def setUp(self):
+        previous = signal.getsignal(signal.SIGUSR1)
+        self.addCleanup(signal.signal, signal.SIGUSR1, previous)
+        self.server = start_instrumentation('test_service', port=0)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def get(self, path):
+        try:
+            with urllib.request.urlopen(self.base_url + path, timeout=5) as response:
+                return response.status, response.read().decode()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read().decode()
+
+    def test_metrics_returns_registry_snapshot(self):
+        registry.counter('test.server.requests').inc(3)
+        status, body = self.get('/metrics')
+        self.assertEqual(status, 200)
+        metrics = json.loads(body)
+        self.assertEqual(set(metrics), {'counters', 'timers', 'gauges'})
+        self.assertEqual(metrics['counters']['test.server.requests'], 3)
+
+    def test_profile_returns_folded_stacks(self):
+        status, body = self.get('/profile?seconds=0.05')
+        self.assertEqual(status, 200)
+        for line in body.splitlines():
+            self.assertRegex(line, FOLDED_LINE)
+
+    def test_profile_rejects_bad_seconds(self):
+        status, _ = self.get('/profile?seconds=abc')
+        self.assertEqual(status, 400)
+
+    def test_profile_conflict_while_running(self):
+        running = threading.Thread(target=instrumentation.profiler.profile, args=(0.5,))
+        running.start()
+        self.addCleanup(running.join)
+        time.sleep(0.05)
+        status, body = self.get('/profile?seconds=0.01')
+        self.assertEqual(status, 409)
+        self.assertIn('already in progress', body)
+
+    def test_unknown_path(self):
+        status, _ = self.get('/nope')
+        self.assertEqual(status, 404)
+
+    def test_sigusr1_handler_installed(self):
+        self.assertIsNot(signal.getsignal(signal.SIGUSR1), signal.SIG_DFL)
+
+
+if __name__ == '__main__':
+    unittest.main()